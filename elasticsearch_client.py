@@ -6,54 +6,59 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Every index (or alias) this project writes to matches this pattern
+INDEX_PATTERN = "contacts_*"
+
+INDEX_MAPPING = {
+    "mappings": {
+        "properties": {
+            "emails": {"type": "text"},
+            "phoneNumbers": {"type": "text"},
+            "firstName": {"type": "text"},
+            "lastName": {"type": "text"},
+            "displayName": {"type": "text"},
+            "company": {"type": "text"},
+            "title": {"type": "text"},
+            "addresses": {"type": "nested", "properties": {
+                "type": {"type": "text"},
+                "address": {"type": "text"}
+            }},
+            "socialProfiles": {"type": "nested", "properties": {
+                "platform": {"type": "text"},
+                "url": {"type": "text"}
+            }},
+            "urls": {"type": "nested", "properties": {
+                "type": {"type": "text"},
+                "url": {"type": "text"}
+            }},
+            "contactInfo": {
+                "type": "object",
+                "properties": {
+                    "id": {"type": "keyword"},
+                    "handles": {"type": "object"}
+                }
+            },
+            "notes": {"type": "text"},
+            "vectorized_notes": {
+                "type": "dense_vector",
+                "dims": 1536,
+                "index": True,
+                "similarity": "cosine"
+            },
+            "custom_blob_id": {"type": "keyword"},  # Define custom_blob_id as keyword
+            "message_blob": {"type": "text"}
+        }
+    }
+}
+
+
 class ElasticsearchClient:
     def __init__(self, host="http://localhost:9200"):
         self.client = Elasticsearch(hosts=[host])
 
     def create_index(self, index_name):
-        index_mapping = {
-            "mappings": {
-                "properties": {
-                    "emails": {"type": "text"},
-                    "phoneNumbers": {"type": "text"},
-                    "firstName": {"type": "text"},
-                    "lastName": {"type": "text"},
-                    "displayName": {"type": "text"},
-                    "company": {"type": "text"},
-                    "title": {"type": "text"},
-                    "addresses": {"type": "nested", "properties": {
-                        "type": {"type": "text"},
-                        "address": {"type": "text"}
-                    }},
-                    "socialProfiles": {"type": "nested", "properties": {
-                        "platform": {"type": "text"},
-                        "url": {"type": "text"}
-                    }},
-                    "urls": {"type": "nested", "properties": {
-                        "type": {"type": "text"},
-                        "url": {"type": "text"}
-                    }},
-                    "contactInfo": {
-                        "type": "object",
-                        "properties": {
-                            "id": {"type": "keyword"},
-                            "handles": {"type": "object"}
-                        }
-                    },
-                    "notes": {"type": "text"},
-                    "vectorized_notes": {
-                        "type": "dense_vector",
-                        "dims": 1536,
-                        "index": True,
-                        "similarity": "cosine"
-                    },
-                    "custom_blob_id": {"type": "keyword"},  # Define custom_blob_id as keyword
-                    "message_blob": {"type": "text"}
-                }
-            }
-        }
         if not self.client.indices.exists(index=index_name):
-            self.client.indices.create(index=index_name, body=index_mapping)
+            self.client.indices.create(index=index_name, body=INDEX_MAPPING)
             logger.info(f"Created index: {index_name}")
 
     def store_contact(self, index_name, contact):
@@ -74,7 +79,7 @@ class ElasticsearchClient:
                 }
             }
         }
-        response = self.client.search(index="contacts_*", body=search_query)
+        response = self.client.search(index=INDEX_PATTERN, body=search_query)
         return response['hits']['hits']
 
     def update_contact_handles(self, index_name, contact_id, handles):
@@ -106,5 +111,5 @@ class ElasticsearchClient:
                 {"custom_blob_id": {"order": "asc"}}
             ]
         }
-        response = self.client.search(index="contacts_*", body=search_query, size=1000)
+        response = self.client.search(index=INDEX_PATTERN, body=search_query, size=1000)
         return [hit['_source']['message_blob'] for hit in response['hits']['hits']]
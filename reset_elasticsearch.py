@@ -1,11 +1,268 @@
-from elasticsearch import Elasticsearch
+import argparse
+import re
+import time
+from fnmatch import fnmatch
 
-def reset_elasticsearch(host="http://localhost:9200"):
+from elasticsearch import Elasticsearch, NotFoundError
+
+from elasticsearch_client import INDEX_MAPPING, INDEX_PATTERN
+
+SNAPSHOT_REPOSITORY = "rag_ingestion_backup"
+SNAPSHOT_LOCATION = "/usr/share/elasticsearch/backup"
+REINDEX_TIMEOUT = 3600
+
+# Rebuilt indices live under this prefix, outside the search pattern, and are
+# only reached through the alias that replaced the original index name
+REBUILD_PREFIX = "rebuild-"
+
+# Strips the rebuild prefix and timestamp to recover the alias an index served
+SNAPSHOT_NAME_PATTERN = re.compile(r"^(?:rebuild-)?(.+?)(?:-\d{14})?$")
+
+
+def project_indices(client, pattern=INDEX_PATTERN):
+    # Resolves both concrete indices and aliases matching the pattern, plus
+    # rebuilt copies that no alias points at any more, so indices that belong
+    # to other applications on the cluster are left alone
+    return dict(client.indices.get_alias(
+        index=f"{pattern},{REBUILD_PREFIX}{pattern}-*",
+        expand_wildcards="open,closed",
+        ignore_unavailable=True,
+    ))
+
+
+def check_open(client, indices):
+    """Fail before any group is touched if one of ``indices`` is closed."""
+    if not indices:
+        return
+    rows = client.cat.indices(index=",".join(indices), h="index,status", format="json",
+                              expand_wildcards="open,closed")
+    closed = sorted(row["index"] for row in rows if row["status"] == "close")
+    if closed:
+        raise ValueError(f"Closed indices cannot be rebuilt or replaced, open or delete them first: {', '.join(closed)}")
+
+
+def group_by_alias(indices, pattern=INDEX_PATTERN):
+    """Map each name searches use to the concrete indices behind it.
+
+    Every concrete index lands in exactly one group. Legacy indices that were
+    never aliased are addressed by their own name, and rebuilt copies kept
+    around without an alias are skipped since nothing reads from them.
+    """
+    targets = {}
+    for index, info in sorted(indices.items()):
+        matching = sorted(alias for alias in info.get("aliases", {}) if fnmatch(alias, pattern))
+        if matching:
+            name = matching[0]
+        elif fnmatch(index, pattern):
+            name = index
+        else:
+            continue
+        targets.setdefault(name, []).append(index)
+    return targets
+
+
+def swap_alias(client, name, old_indices, new_index, indices):
+    """Point ``name`` and every other alias of ``old_indices`` at ``new_index`` in one request."""
+    actions = []
+    aliases = {name}
+    for index in old_indices:
+        aliases.update(indices[index].get("aliases", {}))
+        if index == name:
+            # The name is still a concrete index; it has to go in the same
+            # request that creates the alias so readers never see a gap
+            actions.append({"remove_index": {"index": index}})
+    aliases.discard(new_index)
+    for alias in sorted(aliases):
+        holders = [index for index in old_indices
+                   if index != name and alias in indices[index].get("aliases", {})]
+        if holders:
+            actions.append({"remove": {"index": ",".join(holders), "alias": alias}})
+        actions.append({"add": {"index": new_index, "alias": alias}})
+    client.indices.update_aliases(actions=actions)
+
+
+def reset_elasticsearch(host="http://localhost:9200", pattern=INDEX_PATTERN):
     client = Elasticsearch(hosts=[host])
-    indices = client.indices.get_alias(index="*")
-    for index in indices:
-        client.indices.delete(index=index)
-    print("Elasticsearch indices have been reset.")
+    indices = project_indices(client, pattern)
+    if indices:
+        # A single request for all indices instead of one round trip each
+        client.indices.delete(index=",".join(indices))
+    print(f"Deleted {len(indices)} Elasticsearch indices matching '{pattern}'.")
+
+
+def reindex(host="http://localhost:9200", pattern=INDEX_PATTERN, keep_old=False):
+    """Rebuild every project index with the current mapping and swap the alias atomically."""
+    client = Elasticsearch(hosts=[host])
+    indices = project_indices(client, pattern)
+    targets = group_by_alias(indices, pattern)
+    check_open(client, [index for old_indices in targets.values() for index in old_indices])
+    if keep_old:
+        # A legacy index is dropped by the same request that turns its name
+        # into an alias, so it cannot be kept
+        legacy = sorted(name for name, old_indices in targets.items() if name in old_indices)
+        if legacy:
+            raise ValueError(f"--keep-old cannot keep indices that are not behind an alias yet: {', '.join(legacy)}. "
+                             f"Take a snapshot first, then reindex without --keep-old.")
+
+    suffix = time.strftime("%Y%m%d%H%M%S")
+    for name, old_indices in targets.items():
+        # Kept outside the search pattern so the half-built copy never
+        # shows up twice in results before the swap
+        new_index = f"{REBUILD_PREFIX}{name}-{suffix}"
+        old_settings = client.indices.get_settings(index=old_indices[0], name="index.number_of_replicas")
+        replicas = old_settings[old_indices[0]]["settings"]["index"]["number_of_replicas"]
+        # Replicas and refreshes are only paid for once, after the bulk copy
+        client.indices.create(
+            index=new_index,
+            mappings=INDEX_MAPPING["mappings"],
+            settings={"number_of_replicas": 0, "refresh_interval": "-1"},
+        )
+        task_id = None
+        try:
+            # Writes made after _reindex takes its point-in-time view would be
+            # lost with the old index, so ingestion gets a clear error instead
+            client.indices.put_settings(index=",".join(old_indices), settings={"index.blocks.write": True})
+            # Run as a task so a client timeout can still cancel it; otherwise
+            # its bulk writes would recreate new_index after the cleanup below
+            task_id = client.reindex(
+                source={"index": old_indices},
+                dest={"index": new_index},
+                slices="auto",
+                wait_for_completion=False,
+            )["task"]
+            task = client.options(request_timeout=REINDEX_TIMEOUT + 60).tasks.get(
+                task_id=task_id,
+                wait_for_completion=True,
+                timeout=f"{REINDEX_TIMEOUT}s",
+            )
+            response = task.get("response", {})
+            if task.get("error") or response.get("failures") or response.get("timed_out"):
+                raise RuntimeError(f"Reindex of {name} failed: "
+                                   f"{task.get('error') or response.get('failures') or 'timed out'}")
+            client.indices.put_settings(
+                index=new_index,
+                settings={"number_of_replicas": replicas, "refresh_interval": None},
+            )
+            client.indices.refresh(index=new_index)
+            swap_alias(client, name, old_indices, new_index, indices)
+        except Exception:
+            if task_id:
+                try:
+                    client.tasks.cancel(task_id=task_id, wait_for_completion=True)
+                except NotFoundError:
+                    pass
+            client.indices.delete(index=new_index, ignore_unavailable=True)
+            client.indices.put_settings(index=",".join(old_indices), settings={"index.blocks.write": None})
+            raise
+
+        leftover = [index for index in old_indices if index != name]
+        if keep_old:
+            if leftover:
+                client.indices.put_settings(index=",".join(leftover), settings={"index.blocks.write": None})
+                print(f"Kept previous indices for {name}: {', '.join(leftover)}. "
+                      f"'reset' will still delete them.")
+        elif leftover:
+            client.indices.delete(index=",".join(leftover))
+        print(f"Reindexed {response['total']} documents from {name} into {new_index}.")
+
+
+def register_repository(client, location):
+    # The location must be listed under path.repo in elasticsearch.yml
+    client.snapshot.create_repository(
+        name=SNAPSHOT_REPOSITORY,
+        type="fs",
+        settings={"location": location},
+    )
+
+
+def create_snapshot(host="http://localhost:9200", location=SNAPSHOT_LOCATION,
+                    snapshot=None, pattern=INDEX_PATTERN):
+    client = Elasticsearch(hosts=[host])
+    register_repository(client, location)
+    snapshot = snapshot or f"snapshot-{time.strftime('%Y%m%d%H%M%S')}"
+    client.options(request_timeout=3600).snapshot.create(
+        repository=SNAPSHOT_REPOSITORY,
+        snapshot=snapshot,
+        indices=pattern,
+        include_global_state=False,
+        wait_for_completion=True,
+    )
+    print(f"Created snapshot '{snapshot}' in {location}.")
+
+
+def restore_snapshot(snapshot, host="http://localhost:9200", location=SNAPSHOT_LOCATION,
+                     pattern=INDEX_PATTERN):
+    """Replace the project indices held in ``snapshot`` with their snapshotted copies."""
+    client = Elasticsearch(hosts=[host])
+    register_repository(client, location)
+    # Raises NotFoundError for a mistyped name before anything is touched
+    found = client.snapshot.get(repository=SNAPSHOT_REPOSITORY, snapshot=snapshot)
+    if not found.get("snapshots"):
+        raise ValueError(f"Snapshot '{snapshot}' not found in repository '{SNAPSHOT_REPOSITORY}'.")
+
+    indices = project_indices(client, pattern)
+    targets = group_by_alias(indices, pattern)
+    check_open(client, [index for old_indices in targets.values() for index in old_indices])
+
+    # Restore next to the live indices under fresh names, so the current data
+    # keeps serving until the aliases are swapped over
+    suffix = time.strftime("%Y%m%d%H%M%S")
+    client.options(request_timeout=3600).snapshot.restore(
+        repository=SNAPSHOT_REPOSITORY,
+        snapshot=snapshot,
+        rename_pattern=SNAPSHOT_NAME_PATTERN.pattern,
+        rename_replacement=f"{REBUILD_PREFIX}$1-{suffix}",
+        # Searches and writes go through contacts_* aliases that point at
+        # rebuild-* indices; those aliases are moved by swap_alias below
+        # rather than restored, which would leave them on two indices at once
+        include_aliases=False,
+        include_global_state=False,
+        wait_for_completion=True,
+    )
+
+    for snapshot_index in found["snapshots"][0]["indices"]:
+        name = SNAPSHOT_NAME_PATTERN.match(snapshot_index).group(1)
+        new_index = f"{REBUILD_PREFIX}{name}-{suffix}"
+        old_indices = targets.get(name, [])
+        swap_alias(client, name, old_indices, new_index, indices)
+        leftover = [index for index in old_indices if index != name]
+        if leftover:
+            client.indices.delete(index=",".join(leftover))
+    print(f"Restored snapshot '{snapshot}'.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintenance tasks for the RAG ingestion Elasticsearch indices.")
+    parser.add_argument("--host", default="http://localhost:9200", help="Elasticsearch host")
+    parser.add_argument("--pattern", default=INDEX_PATTERN, help="Index or alias pattern owned by this project")
+    subparsers = parser.add_subparsers(dest="command")
+
+    subparsers.add_parser("reset", help="Delete all project indices (default)")
+
+    reindex_parser = subparsers.add_parser("reindex", help="Rebuild indices with the current mapping and swap aliases")
+    reindex_parser.add_argument("--keep-old", action="store_true", help="Keep the previous indices after the swap "
+                                     "(only for indices already behind an alias)")
+
+    snapshot_parser = subparsers.add_parser("snapshot", help="Snapshot project indices to a filesystem repository")
+    snapshot_parser.add_argument("--location", default=SNAPSHOT_LOCATION,
+                                 help="Repository path on the Elasticsearch node (must be in path.repo)")
+    snapshot_parser.add_argument("--name", help="Snapshot name (defaults to a timestamp)")
+
+    restore_parser = subparsers.add_parser("restore", help="Restore project indices from a snapshot")
+    restore_parser.add_argument("name", help="Snapshot name")
+    restore_parser.add_argument("--location", default=SNAPSHOT_LOCATION,
+                                help="Repository path on the Elasticsearch node (must be in path.repo)")
+
+    args = parser.parse_args()
+    if args.command == "reindex":
+        reindex(args.host, args.pattern, args.keep_old)
+    elif args.command == "snapshot":
+        create_snapshot(args.host, args.location, args.name, args.pattern)
+    elif args.command == "restore":
+        restore_snapshot(args.name, args.host, args.location, args.pattern)
+    else:
+        reset_elasticsearch(args.host, args.pattern)
+
 
 if __name__ == "__main__":
-    reset_elasticsearch()
+    main()
@@ -0,0 +1,176 @@
+import unittest
+from unittest.mock import Mock, patch
+
+from elasticsearch import ConnectionTimeout, NotFoundError
+
+import reset_elasticsearch
+from reset_elasticsearch import group_by_alias, project_indices, reindex, reset_elasticsearch as reset, restore_snapshot
+
+
+def mock_client(indices):
+    client = Mock()
+    client.options.return_value = client
+    client.indices.get_alias.return_value = indices
+    client.indices.get_settings.side_effect = lambda index, name: {
+        index: {"settings": {"index": {"number_of_replicas": "1"}}}
+    }
+    client.cat.indices.side_effect = lambda index, **kwargs: [
+        {"index": name, "status": "open"} for name in index.split(",")
+    ]
+    client.reindex.return_value = {"task": "node:1"}
+    client.tasks.get.return_value = {"completed": True, "response": {"total": 3, "failures": [], "timed_out": False}}
+    return client
+
+
+class TestResetElasticsearch(unittest.TestCase):
+
+    def setUp(self):
+        patcher = patch.object(reset_elasticsearch, "Elasticsearch")
+        self.es_class = patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch.object(reset_elasticsearch.time, "strftime", return_value="20260101000000")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def use(self, indices):
+        client = mock_client(indices)
+        self.es_class.return_value = client
+        return client
+
+    def update_actions(self, client):
+        return client.indices.update_aliases.call_args.kwargs["actions"]
+
+    def test_project_indices_limited_to_pattern(self):
+        client = mock_client({"contacts_0": {"aliases": {}}})
+        self.assertEqual(project_indices(client), {"contacts_0": {"aliases": {}}})
+        client.indices.get_alias.assert_called_once_with(
+            index="contacts_*,rebuild-contacts_*-*", expand_wildcards="open,closed", ignore_unavailable=True)
+
+    def test_project_indices_with_exact_pattern(self):
+        kept = "rebuild-contacts_0-20250101000000"
+        client = self.use({kept: {"aliases": {}}})
+        reset(pattern="contacts_0")
+        client.indices.get_alias.assert_called_once_with(
+            index="contacts_0,rebuild-contacts_0-*", expand_wildcards="open,closed", ignore_unavailable=True)
+        client.indices.delete.assert_called_once_with(index=kept)
+
+    def test_reset_deletes_in_one_request(self):
+        client = self.use({"contacts_0": {"aliases": {}}, "rebuild-contacts_1-20250101000000": {"aliases": {"contacts_1": {}}}})
+        reset()
+        client.indices.delete.assert_called_once_with(index="contacts_0,rebuild-contacts_1-20250101000000")
+
+    def test_reset_without_indices_deletes_nothing(self):
+        client = self.use({})
+        reset()
+        client.indices.delete.assert_not_called()
+
+    def test_group_by_alias_rebuilds_each_index_once(self):
+        indices = {
+            "rebuild-contacts_0-20250101000000": {"aliases": {"contacts_0": {}, "other": {}}},
+            "contacts_1": {"aliases": {}},
+            "rebuild-contacts_2-20240101000000": {"aliases": {}},
+        }
+        self.assertEqual(group_by_alias(indices), {
+            "contacts_0": ["rebuild-contacts_0-20250101000000"],
+            "contacts_1": ["contacts_1"],
+        })
+
+    def test_reindex_legacy_index(self):
+        client = self.use({"contacts_0": {"aliases": {}}})
+        reindex()
+        self.assertEqual(self.update_actions(client), [
+            {"remove_index": {"index": "contacts_0"}},
+            {"add": {"index": "rebuild-contacts_0-20260101000000", "alias": "contacts_0"}},
+        ])
+        client.indices.put_settings.assert_any_call(index="contacts_0", settings={"index.blocks.write": True})
+        client.indices.delete.assert_not_called()
+
+    def test_reindex_aliased_index_carries_other_aliases(self):
+        old = "rebuild-contacts_0-20250101000000"
+        client = self.use({old: {"aliases": {"contacts_0": {}, "other": {}}}})
+        reindex()
+        new = "rebuild-contacts_0-20260101000000"
+        self.assertEqual(self.update_actions(client), [
+            {"remove": {"index": old, "alias": "contacts_0"}},
+            {"add": {"index": new, "alias": "contacts_0"}},
+            {"remove": {"index": old, "alias": "other"}},
+            {"add": {"index": new, "alias": "other"}},
+        ])
+        client.indices.update_aliases.assert_called_once()
+        client.indices.delete.assert_called_once_with(index=old)
+
+    def test_reindex_keep_old_unblocks_kept_index(self):
+        old = "rebuild-contacts_0-20250101000000"
+        client = self.use({old: {"aliases": {"contacts_0": {}}}})
+        reindex(keep_old=True)
+        client.indices.delete.assert_not_called()
+        client.indices.put_settings.assert_called_with(index=old, settings={"index.blocks.write": None})
+
+    def test_reindex_failure_rolls_back(self):
+        client = self.use({"contacts_0": {"aliases": {}}})
+        client.tasks.get.return_value = {"completed": True, "response": {"total": 3, "failures": [{"cause": "boom"}]}}
+        with self.assertRaises(RuntimeError):
+            reindex()
+        client.tasks.cancel.assert_called_once_with(task_id="node:1", wait_for_completion=True)
+        client.indices.delete.assert_called_once_with(
+            index="rebuild-contacts_0-20260101000000", ignore_unavailable=True)
+        client.indices.put_settings.assert_called_with(index="contacts_0", settings={"index.blocks.write": None})
+        client.indices.update_aliases.assert_not_called()
+
+    def test_reindex_timeout_cancels_task_before_cleanup(self):
+        client = self.use({"contacts_0": {"aliases": {}}})
+        client.tasks.get.side_effect = ConnectionTimeout("timed out")
+        calls = Mock()
+        calls.attach_mock(client.tasks.cancel, "cancel")
+        calls.attach_mock(client.indices.delete, "delete")
+        with self.assertRaises(ConnectionTimeout):
+            reindex()
+        self.assertEqual([call[0] for call in calls.mock_calls], ["cancel", "delete"])
+        client.indices.update_aliases.assert_not_called()
+
+    def test_reindex_keep_old_refuses_legacy_index(self):
+        client = self.use({"contacts_0": {"aliases": {}}})
+        with self.assertRaises(ValueError):
+            reindex(keep_old=True)
+        client.indices.create.assert_not_called()
+        client.reindex.assert_not_called()
+        client.indices.update_aliases.assert_not_called()
+
+    def test_reindex_closed_index_fails_before_any_group(self):
+        client = self.use({"contacts_0": {"aliases": {}}, "contacts_1": {"aliases": {}}})
+        client.cat.indices.side_effect = None
+        client.cat.indices.return_value = [{"index": "contacts_0", "status": "open"},
+                                           {"index": "contacts_1", "status": "close"}]
+        with self.assertRaises(ValueError):
+            reindex()
+        client.indices.create.assert_not_called()
+        client.indices.update_aliases.assert_not_called()
+
+    def test_restore_missing_snapshot_deletes_nothing(self):
+        client = self.use({"contacts_0": {"aliases": {}}})
+        client.snapshot.get.side_effect = NotFoundError("snapshot_missing_exception", Mock(status=404), {})
+        with self.assertRaises(NotFoundError):
+            restore_snapshot("typo")
+        client.snapshot.create_repository.assert_called_once()
+        client.snapshot.restore.assert_not_called()
+        client.indices.delete.assert_not_called()
+
+    def test_restore_swaps_restored_indices_in(self):
+        old = "rebuild-contacts_0-20250101000000"
+        client = self.use({old: {"aliases": {"contacts_0": {}}}, "contacts_1": {"aliases": {}}})
+        client.snapshot.get.return_value = {"snapshots": [{"indices": ["rebuild-contacts_0-20240101000000", "contacts_1"]}]}
+        restore_snapshot("before-mapping-change")
+        self.assertEqual(client.snapshot.restore.call_args.kwargs["rename_replacement"],
+                         "rebuild-$1-20260101000000")
+        actions = [call.kwargs["actions"] for call in client.indices.update_aliases.call_args_list]
+        self.assertEqual(actions, [
+            [{"remove": {"index": old, "alias": "contacts_0"}},
+             {"add": {"index": "rebuild-contacts_0-20260101000000", "alias": "contacts_0"}}],
+            [{"remove_index": {"index": "contacts_1"}},
+             {"add": {"index": "rebuild-contacts_1-20260101000000", "alias": "contacts_1"}}],
+        ])
+        client.indices.delete.assert_called_once_with(index=old)
+
+
+if __name__ == '__main__':
+    unittest.main()